@@ -270,6 +270,7 @@ def run_chat(
             obs.record("chat_reply", session=session, chars=len(reply))
     finally:
         mcp_runtime.close()
+        tools.close()
 
 
 def run_serve(
@@ -501,6 +502,7 @@ def run_heartbeat(
         return 0
     finally:
         mcp_runtime.close()
+        tools.close()
 
 
 def _run_task_once(
@@ -537,6 +539,7 @@ def _run_task_once(
         return False, f"{type(exc).__name__}: {exc}"
     finally:
         mcp_runtime.close()
+        tools.close()
 
 
 def run_tasks(args: argparse.Namespace) -> int:
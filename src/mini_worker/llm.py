@@ -47,17 +47,25 @@ class ChatClient:
         )
 
     def chat_completion(
-        self, messages: list[dict[str, Any]], tools: list[dict[str, Any]]
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        tools_json: str | None = None,
     ) -> dict[str, Any]:
         payload = {
             "model": self.cfg.model,
             "messages": messages,
-            "tools": tools,
             "tool_choice": "auto",
             "temperature": 0.2,
         }
 
-        data = json.dumps(payload).encode("utf-8")
+        if tools_json is None:
+            payload["tools"] = tools
+            data = json.dumps(payload).encode("utf-8")
+        else:
+            # Splice in the registry's pre-serialized tool schemas.
+            body = json.dumps(payload)
+            data = f'{body[:-1]}, "tools": {tools_json}}}'.encode("utf-8")
         req = request.Request(
             url=f"{self.cfg.base_url}/chat/completions",
             data=data,
@@ -1,9 +1,10 @@
+import atexit
 import json
 import time
 from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from threading import Lock
+from threading import Event, Lock, Thread
 from typing import Any
 
 
@@ -13,6 +14,11 @@ class Observability:
     _lock: Lock = field(default_factory=Lock, init=False)
     _recent: deque[dict[str, Any]] = field(default_factory=lambda: deque(maxlen=300), init=False)
     _counters: dict[str, int] = field(default_factory=dict, init=False)
+    _pending: deque[dict[str, Any]] = field(
+        default_factory=lambda: deque(maxlen=10000), init=False
+    )
+    _wakeup: Event = field(default_factory=Event, init=False)
+    _io_lock: Lock = field(default_factory=Lock, init=False)
 
     def __post_init__(self) -> None:
         root = Path(self.workspace).resolve() / ".mini_worker" / "observability"
@@ -28,6 +34,8 @@ class Observability:
                     }
             except Exception:
                 self._counters = {}
+        Thread(target=self._writer_loop, daemon=True).start()
+        atexit.register(self.flush)
 
     def record(self, event_type: str, **fields: Any) -> None:
         event = {
@@ -35,18 +43,45 @@ class Observability:
             "event": event_type,
             **fields,
         }
-        raw = json.dumps(event, ensure_ascii=True)
         with self._lock:
             self._recent.append(event)
             self._counters[event_type] = self._counters.get(event_type, 0) + 1
+        self._pending.append(event)
+        self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._io_lock:
+            events: list[dict[str, Any]] = []
+            while self._pending:
+                try:
+                    events.append(self._pending.popleft())
+                except IndexError:
+                    break
+            if not events:
+                return
+            raw = "".join(
+                json.dumps(event, ensure_ascii=True, default=str) + "\n"
+                for event in events
+            )
+            with self._lock:
+                counters = dict(self._counters)
             self.events_path.parent.mkdir(parents=True, exist_ok=True)
             with self.events_path.open("a", encoding="utf-8") as fh:
-                fh.write(raw + "\n")
+                fh.write(raw)
             self.metrics_path.write_text(
-                json.dumps(self._counters, ensure_ascii=True, indent=2),
+                json.dumps(counters, ensure_ascii=True, indent=2),
                 encoding="utf-8",
             )
 
+    def _writer_loop(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                continue
+
     def metrics(self) -> dict[str, Any]:
         with self._lock:
             return {
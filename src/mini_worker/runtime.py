@@ -62,7 +62,9 @@ class AgentRuntime:
                 event_callback,
                 {"phase": "llm_round_start", "round": round_index},
             )
-            response = self.client.chat_completion(self.messages, self.tools.schemas())
+            response = self.client.chat_completion(
+                self.messages, self.tools.schemas(), tools_json=self.tools.schemas_json()
+            )
             message = response["choices"][0]["message"]
             self._emit(
                 event_callback,
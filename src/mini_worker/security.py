@@ -1,3 +1,4 @@
+import functools
 import json
 import re
 from dataclasses import dataclass, field
@@ -6,6 +7,13 @@ from typing import Any
 from urllib.parse import urlparse
 
 
+@functools.lru_cache(maxsize=32)
+def _blocked_pattern(tokens: tuple[str, ...]) -> re.Pattern[str] | None:
+    if not tokens:
+        return None
+    return re.compile("|".join(re.escape(token) for token in tokens), re.IGNORECASE)
+
+
 @dataclass
 class SecurityPolicy:
     allow_shell: bool = True
@@ -65,8 +73,8 @@ class SecurityPolicy:
     def check_shell(self, command: str, timeout: int) -> tuple[bool, str | None]:
         if not self.allow_shell:
             return False, "Shell execution is disabled by security policy"
-        lowered = command.lower()
-        if any(token in lowered for token in self.blocked_shell_tokens):
+        blocked = _blocked_pattern(tuple(self.blocked_shell_tokens))
+        if blocked is not None and blocked.search(command):
             return False, "Command blocked by security policy"
         if timeout > self.max_shell_timeout:
             return False, f"Timeout exceeds policy limit ({self.max_shell_timeout}s)"
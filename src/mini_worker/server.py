@@ -1,13 +1,17 @@
 import cgi
+import gzip
 import io
 import json
+import re
 import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
+from email.utils import formatdate
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
 
 from .agents import AGENTS, get_agent
 from .config import available_providers
@@ -20,6 +24,20 @@ from .settings import SettingsStore
 from .tasking import ScheduledTask, TaskStore, run_due_tasks
 from .tools import ToolRegistry
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MCP_POOL_SIZE = 8
+_AGENT_NAMES = sorted(AGENTS)
+_PROVIDERS = available_providers()
+
 
 HTML_PAGE = r"""<!doctype html>
 <html lang="zh-CN">
@@ -703,6 +721,11 @@ TASKS_PAGE = r"""<!doctype html>
 </html>
 """
 
+HTML_PAGE_BYTES = HTML_PAGE.encode("utf-8")
+HTML_PAGE_GZ = gzip.compress(HTML_PAGE_BYTES, compresslevel=9)
+TASKS_PAGE_BYTES = TASKS_PAGE.encode("utf-8")
+TASKS_PAGE_GZ = gzip.compress(TASKS_PAGE_BYTES, compresslevel=9)
+
 
 @dataclass
 class ServerConfig:
@@ -722,13 +745,21 @@ class WebApp:
         self.cfg = cfg
         self.client = client
         self.obs = cfg.observability or Observability(cfg.workspace)
+        self._workspace_resolved = str(Path(cfg.workspace).resolve())
         self.timeout_seconds = client.cfg.timeout_seconds
         self.tools = ToolRegistry(workspace=cfg.workspace)
         self.mcp_runtime = MCPRuntime(workspace=cfg.workspace, config_path=cfg.mcp_config)
         self.mcp_runtime.mount(self.tools)
         self.task_store = TaskStore(cfg.workspace)
         self.runtimes: dict[tuple[str, str], AgentRuntime] = {}
+        self.memories: dict[str, SessionMemory] = {}
         self._lock = threading.Lock()
+        self._mcp_pool: OrderedDict[
+            tuple[str, str | None],
+            tuple[ToolRegistry, MCPRuntime, tuple[int | None, int | None]],
+        ] = OrderedDict()
+        self._mcp_pool_lock = threading.Lock()
+        self._settings_stores: dict[str, SettingsStore] = {}
         self._scheduler_stop = threading.Event()
         self._scheduler_thread: threading.Thread | None = None
         self._current_request: dict[str, Any] = {}
@@ -744,6 +775,9 @@ class WebApp:
             self._current_request["aborted"] = True
             if self._current_request.get("runtime"):
                 self._current_request["runtime"]._aborted = True
+            on_abort = self._current_request.get("on_abort")
+            if on_abort is not None:
+                on_abort()
             return {"ok": True, "message": "请求已终止"}
         return {"ok": False, "error": "没有正在进行的请求"}
 
@@ -753,18 +787,28 @@ class WebApp:
         if runtime is not None:
             return runtime
 
-        memory = None
-        if not self.cfg.no_memory:
-            memory = SessionMemory(workspace=self.cfg.workspace, session_id=session_id)
+        with self._lock:
+            runtime = self.runtimes.get(key)
+            if runtime is not None:
+                return runtime
+
+            memory = None
+            if not self.cfg.no_memory:
+                memory = self.memories.get(session_id)
+                if memory is None:
+                    memory = SessionMemory(
+                        workspace=self.cfg.workspace, session_id=session_id
+                    )
+                    self.memories[session_id] = memory
 
-        runtime = AgentRuntime(
-            agent=get_agent(agent_name),
-            client=self.client,
-            tools=self.tools,
-            memory=memory,
-        )
-        self.runtimes[key] = runtime
-        return runtime
+            runtime = AgentRuntime(
+                agent=get_agent(agent_name),
+                client=self.client,
+                tools=self.tools,
+                memory=memory,
+            )
+            self.runtimes[key] = runtime
+            return runtime
 
     def status(self) -> dict[str, Any]:
         return {
@@ -772,9 +816,9 @@ class WebApp:
             "model": self.cfg.model,
             "base_url": self.client.cfg.base_url,
             "api_key_configured": bool(self.client.cfg.api_key),
-            "workspace": str(Path(self.cfg.workspace).resolve()),
-            "agents": sorted(list(AGENTS.keys())),
-            "providers": available_providers(),
+            "workspace": self._workspace_resolved,
+            "agents": _AGENT_NAMES,
+            "providers": _PROVIDERS,
             "mcp_config": self.cfg.mcp_config,
             "mcp_mounted_tools": len(self.mcp_runtime.mounted_tools),
             "mcp_tools": self.mcp_runtime.mounted_tools,
@@ -801,7 +845,8 @@ class WebApp:
             self.client = client
             self.cfg.provider = client.cfg.provider
             self.cfg.model = client.cfg.model
-            self.runtimes.clear()
+            for runtime in self.runtimes.values():
+                runtime.client = client
 
         return {
             "ok": True,
@@ -824,7 +869,9 @@ class WebApp:
             return {"ok": False, "error": f"unknown agent: {agent_name}"}
 
         runtime = self._runtime_for(session_id=session_id, agent_name=agent_name)
-        
+        if self._current_request.get("session") == session_id:
+            self._current_request["runtime"] = runtime
+
         def combined_callback(evt):
             self.obs.record(
                 "runtime_event",
@@ -894,7 +941,7 @@ class WebApp:
     def _run_task_once(
         self, task: ScheduledTask, progress_callback: Any
     ) -> tuple[bool, str]:
-        settings = SettingsStore(task.workspace).load()
+        settings = self._settings_store(task.workspace).load()
         api_key = settings.api_keys.get(task.provider)
         client = ChatClient.from_options(
             provider=task.provider,
@@ -903,10 +950,8 @@ class WebApp:
             base_url=task.base_url,
             timeout_seconds=self.timeout_seconds,
         )
-        tools = ToolRegistry(workspace=task.workspace)
-        mcp_runtime = MCPRuntime(workspace=task.workspace, config_path=task.mcp_config)
         try:
-            mcp_runtime.mount(tools)
+            tools = self._acquire_mcp(task.workspace, task.mcp_config)
             memory = (
                 None
                 if task.no_memory
@@ -922,8 +967,49 @@ class WebApp:
             return True, reply
         except Exception as exc:  # noqa: BLE001
             return False, f"{type(exc).__name__}: {exc}"
-        finally:
+
+    def _settings_store(self, workspace: str) -> SettingsStore:
+        store = self._settings_stores.get(workspace)
+        if store is None:
+            store = self._settings_stores.setdefault(workspace, SettingsStore(workspace))
+        return store
+
+    def _acquire_mcp(self, workspace: str, mcp_config: str | None) -> ToolRegistry:
+        key = (workspace, mcp_config)
+        # Registries hold the security policy and MCP tools read when they were
+        # built, so an edit to either file retires the pooled pair.
+        stamp = _config_mtimes(workspace, mcp_config)
+        evicted: list[tuple[ToolRegistry, MCPRuntime, Any]] = []
+        with self._mcp_pool_lock:
+            pooled = self._mcp_pool.get(key)
+            if pooled is not None and pooled[2] == stamp:
+                self._mcp_pool.move_to_end(key)
+                return pooled[0]
+            if pooled is not None:
+                evicted.append(self._mcp_pool.pop(key))
+            tools = ToolRegistry(workspace=workspace)
+            mcp_runtime = MCPRuntime(workspace=workspace, config_path=mcp_config)
+            try:
+                mcp_runtime.mount(tools)
+            except Exception:
+                mcp_runtime.close()
+                raise
+            self._mcp_pool[key] = (tools, mcp_runtime, stamp)
+            while len(self._mcp_pool) > MCP_POOL_SIZE:
+                _, stale = self._mcp_pool.popitem(last=False)
+                evicted.append(stale)
+        for stale_tools, stale_runtime, _ in evicted:
+            stale_runtime.close()
+            stale_tools.close()
+        return tools
+
+    def close_mcp_pool(self) -> None:
+        with self._mcp_pool_lock:
+            pooled = list(self._mcp_pool.values())
+            self._mcp_pool.clear()
+        for tools, mcp_runtime, _ in pooled:
             mcp_runtime.close()
+            tools.close()
 
     def _scheduler_loop(self) -> None:
         self.obs.record("scheduler_started", workspace=self.cfg.workspace)
@@ -937,13 +1023,39 @@ class WebApp:
             except Exception as exc:  # noqa: BLE001
                 self.obs.record("scheduler_error", error=str(exc))
             self._scheduler_stop.wait(3)
+        self.close_mcp_pool()
         self.obs.record("scheduler_stopped", workspace=self.cfg.workspace)
 
 
+_POST_ROUTES: dict[str, Callable[[WebApp, dict[str, Any]], dict[str, Any]]] = {
+    "/api/config": WebApp.update_config,
+    "/api/chat": WebApp.chat,
+    "/api/chat_abort": WebApp.abort,
+    "/api/tasks": WebApp.add_task,
+    "/api/tasks/delete": WebApp.delete_task,
+    "/api/tasks/run_due": lambda app, payload: app.run_due_once(),
+}
+_POST_PATHS = frozenset({*_POST_ROUTES, "/api/chat_stream"})
+_OK = HTTPStatus.OK
+_BAD_REQUEST = HTTPStatus.BAD_REQUEST
+
+
+def _config_mtimes(workspace: str, mcp_config: str | None) -> tuple[int | None, int | None]:
+    root = Path(workspace).resolve()
+    paths = [root / ".mini_worker" / "security.json", root / mcp_config if mcp_config else None]
+    stamps: list[int | None] = []
+    for path in paths:
+        try:
+            stamps.append(path.stat().st_mtime_ns if path is not None else None)
+        except OSError:
+            stamps.append(None)
+    return stamps[0], stamps[1]
+
+
 def _json(
     handler: BaseHTTPRequestHandler, status: int, payload: dict[str, Any]
 ) -> None:
-    raw = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+    raw = _dumps(payload)
     handler.send_response(status)
     handler.send_header("Content-Type", "application/json; charset=utf-8")
     handler.send_header("Content-Length", str(len(raw)))
@@ -951,253 +1063,311 @@ def _json(
     handler.wfile.write(raw)
 
 
-def _html(handler: BaseHTTPRequestHandler, status: int, body: str) -> None:
-    raw = body.encode("utf-8")
+_date_cache: tuple[int, str] = (0, "")
+
+
+def _http_date() -> str:
+    global _date_cache
+    now = int(time.time())
+    if _date_cache[0] != now:
+        _date_cache = (now, formatdate(now, usegmt=True))
+    return _date_cache[1]
+
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return _encode(payload).encode("utf-8")
+
+
+def _loads(body: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _wants_msgpack(handler: BaseHTTPRequestHandler) -> bool:
+    if msgpack is None:
+        return False
+    return "application/msgpack" in handler.headers.get("Accept", "")
+
+
+def _bulk(
+    handler: BaseHTTPRequestHandler, status: int, payload: dict[str, Any]
+) -> None:
+    if not _wants_msgpack(handler):
+        _json(handler, status, payload)
+        return
+    raw = msgpack.packb(payload, use_bin_type=True)
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/msgpack")
+    handler.send_header("Content-Length", str(len(raw)))
+    handler.send_header("Vary", "Accept")
+    handler.end_headers()
+    handler.wfile.write(raw)
+
+
+def _html(
+    handler: BaseHTTPRequestHandler,
+    status: int,
+    body: bytes,
+    gz: bytes | None = None,
+) -> None:
+    accepts_gzip = "gzip" in handler.headers.get("Accept-Encoding", "").lower()
+    raw = gz if gz is not None and accepts_gzip else body
     handler.send_response(status)
     handler.send_header("Content-Type", "text/html; charset=utf-8")
+    if raw is gz:
+        handler.send_header("Content-Encoding", "gzip")
+    if gz is not None:
+        handler.send_header("Vary", "Accept-Encoding")
     handler.send_header("Content-Length", str(len(raw)))
     handler.end_headers()
     handler.wfile.write(raw)
 
 
+def _sse_frame(payload: dict[str, Any]) -> bytes:
+    return b"data: " + _dumps(payload) + b"\n\n"
+
+
 def _sse(handler: BaseHTTPRequestHandler, payload: dict[str, Any]) -> None:
-    data = json.dumps(payload, ensure_ascii=True)
-    frame = f"data: {data}\n\n".encode("utf-8")
-    handler.wfile.write(frame)
+    handler.wfile.write(_sse_frame(payload))
     handler.wfile.flush()
 
 
+_THINK_RE = re.compile(r"<think>.*?(?:</think>|\Z)", re.IGNORECASE | re.DOTALL)
+
+
 def _clean_reply(text: str) -> str:
-    start = text.lower().find("<think>")
-    while start >= 0:
-        end = text.lower().find("</think>", start)
-        if end < 0:
-            text = text[:start]
-            break
-        text = text[:start] + text[end + len("</think>") :]
-        start = text.lower().find("<think>")
-    return text.strip()
-
-
-def _chunk_text(text: str, chunk_size: int = 30) -> list[str]:
+    if "<" not in text:
+        return text.strip()
+    return _THINK_RE.sub("", text).strip()
+
+
+def _iter_chunks(text: str, chunk_size: int = 30) -> Iterator[str]:
     if not text:
-        return [""]
-    chunks: list[str] = []
-    index = 0
-    while index < len(text):
-        chunks.append(text[index : index + chunk_size])
-        index += chunk_size
-    return chunks
+        yield ""
+        return
+    for index in range(0, len(text), chunk_size):
+        yield text[index : index + chunk_size]
 
 
-def run_web_server(cfg: ServerConfig, client: ChatClient) -> int:
-    app = WebApp(cfg, client)
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    app: WebApp
 
-    class Handler(BaseHTTPRequestHandler):
-        def do_GET(self) -> None:  # noqa: N802
-            if self.path == "/" or self.path == "/index.html":
-                _html(self, HTTPStatus.OK, HTML_PAGE)
-                return
-            if self.path == "/tasks.html":
-                _html(self, HTTPStatus.OK, TASKS_PAGE)
-                return
-            if self.path == "/api/status":
-                _json(self, HTTPStatus.OK, app.status())
-                return
-            if self.path == "/api/tasks":
-                _json(self, HTTPStatus.OK, app.tasks())
-                return
-            if self.path == "/api/metrics":
-                _json(self, HTTPStatus.OK, app.metrics())
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/" or self.path == "/index.html":
+            _html(self, HTTPStatus.OK, HTML_PAGE_BYTES, HTML_PAGE_GZ)
+            return
+        if self.path == "/tasks.html":
+            _html(self, HTTPStatus.OK, TASKS_PAGE_BYTES, TASKS_PAGE_GZ)
+            return
+        if self.path == "/api/status":
+            _json(self, HTTPStatus.OK, self.app.status())
+            return
+        if self.path == "/api/tasks":
+            _bulk(self, HTTPStatus.OK, self.app.tasks())
+            return
+        if self.path == "/api/metrics":
+            _json(self, HTTPStatus.OK, self.app.metrics())
+            return
+        if self.path.startswith("/api/events"):
+            limit = 80
+            if "limit=" in self.path:
+                try:
+                    limit = int(self.path.split("limit=", 1)[1].split("&", 1)[0])
+                except Exception:
+                    limit = 80
+            _bulk(self, HTTPStatus.OK, self.app.events(limit=limit))
+            return
+        _json(self, HTTPStatus.NOT_FOUND, {"ok": False, "error": "not found"})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path not in _POST_PATHS:
+            self.close_connection = True
+            _json(self, HTTPStatus.NOT_FOUND, {"ok": False, "error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            if length < 0:
+                raise ValueError("invalid Content-Length")
+            body = self._read_body(length)
+            if len(body) < length:
+                self.close_connection = True
+            content_type = self.headers.get("Content-Type", "")
+            
+            payload = {}
+            files = []
+            
+            if "multipart/form-data" in content_type:
+                form = cgi.FieldStorage(
+                    fp=io.BytesIO(body),
+                    headers=self.headers,
+                    environ={
+                        'REQUEST_METHOD': 'POST',
+                        'CONTENT_TYPE': content_type,
+                    }
+                )
+                payload = {
+                    "message": form.getvalue("message", ""),
+                    "session": form.getvalue("session", "default"),
+                    "agent": form.getvalue("agent", "miniagent_like"),
+                }
+                files = []
+                if form.file:
+                    for f in form.list or []:
+                        if f.filename:
+                            files.append((f.filename, f.file.read()))
+            else:
+                payload = _loads(body) if body else {}
+                if not isinstance(payload, dict):
+                    _json(
+                        self,
+                        HTTPStatus.BAD_REQUEST,
+                        {"ok": False, "error": "JSON object expected"},
+                    )
+                    return
+            
+            route = _POST_ROUTES.get(self.path)
+            if route is not None:
+                result = route(self.app, payload)
+                _json(self, _OK if result.get("ok") else _BAD_REQUEST, result)
                 return
-            if self.path.startswith("/api/events"):
-                limit = 80
-                if "limit=" in self.path:
+
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            session_id = payload.get("session", "default")
+            write_lock = threading.Lock()
+            stream_closed = False
+
+            def send(data: dict[str, Any] | list[dict[str, Any]]) -> None:
+                nonlocal stream_closed
+                frames = data if isinstance(data, list) else [data]
+                with write_lock:
+                    if stream_closed:
+                        return
+                    if frames[-1]["type"] in ("aborted", "done", "error"):
+                        stream_closed = True
                     try:
-                        limit = int(self.path.split("limit=", 1)[1].split("&", 1)[0])
-                    except Exception:
-                        limit = 80
-                _json(self, HTTPStatus.OK, app.events(limit=limit))
+                        self.wfile.write(b"".join(_sse_frame(f) for f in frames))
+                        self.wfile.flush()
+                    except OSError:
+                        stream_closed = True
+
+            self.app._current_request = {
+                "session": session_id,
+                "aborted": False,
+                "runtime": None,
+                "on_abort": lambda: send({"type": "aborted"}),
+            }
+
+            tool_start_times: dict[str, float] = {}
+
+            def event_forwarder(evt):
+                phase = evt.get("phase", "")
+                if phase == "tool_start":
+                    tool_start_times[evt.get("tool_name", "")] = time.time()
+                    send({
+                        "type": "tool_start",
+                        "tool_name": evt.get("tool_name", ""),
+                        "tool_index": evt.get("tool_index", 0),
+                        "tool_total": evt.get("tool_total", 0),
+                    })
+                elif phase == "tool_end":
+                    start_time = tool_start_times.get(evt.get("tool_name", ""))
+                    elapsed = time.time() - start_time if start_time else 0
+                    send({
+                        "type": "tool_end",
+                        "tool_name": evt.get("tool_name", ""),
+                        "tool_index": evt.get("tool_index", 0),
+                        "ok": evt.get("ok", False),
+                        "elapsed": round(elapsed, 2),
+                    })
+                elif phase == "llm_round_start":
+                    send({"type": "llm_start", "round": evt.get("round", 0)})
+                elif phase == "llm_round_end":
+                    send({"type": "llm_end", "round": evt.get("round", 0)})
+                elif phase == "aborted":
+                    send({"type": "aborted"})
+
+            send({"type": "status", "state": "thinking", "tick": 0})
+            try:
+                result = self.app.chat(payload, event_callback=event_forwarder)
+            except Exception as exc:  # noqa: BLE001
+                send({"type": "error", "error": str(exc)})
                 return
-            _json(self, HTTPStatus.NOT_FOUND, {"ok": False, "error": "not found"})
 
-        def do_POST(self) -> None:  # noqa: N802
-            if self.path not in {
-                "/api/chat",
-                "/api/chat_stream",
-                "/api/chat_abort",
-                "/api/config",
-                "/api/tasks",
-                "/api/tasks/delete",
-                "/api/tasks/run_due",
-            }:
-                _json(self, HTTPStatus.NOT_FOUND, {"ok": False, "error": "not found"})
+            if self.app._current_request.get("aborted"):
+                send({"type": "aborted"})
+                return
+            if not result.get("ok"):
+                send(
+                    {
+                        "type": "error",
+                        "error": result.get("error", "request failed"),
+                    }
+                )
                 return
 
+            cleaned = _clean_reply(str(result.get("reply", "")))
+            frames = [
+                {"type": "delta", "text": chunk}
+                for chunk in _iter_chunks(cleaned, chunk_size=36)
+            ]
+            frames.append({"type": "done"})
+            send(frames)
+        except Exception as exc:  # noqa: BLE001
+            # The body may not have been read, so the connection cannot be reused.
+            self.close_connection = True
             try:
-                length = int(self.headers.get("Content-Length", "0"))
-                body = self.rfile.read(length) if length > 0 else b"{}"
-                content_type = self.headers.get("Content-Type", "")
-                
-                payload = {}
-                files = []
-                
-                if "multipart/form-data" in content_type:
-                    form = cgi.FieldStorage(
-                        fp=io.BytesIO(body),
-                        headers=self.headers,
-                        environ={
-                            'REQUEST_METHOD': 'POST',
-                            'CONTENT_TYPE': content_type,
-                        }
-                    )
-                    payload = {
-                        "message": form.getvalue("message", ""),
-                        "session": form.getvalue("session", "default"),
-                        "agent": form.getvalue("agent", "miniagent_like"),
-                    }
-                    files = []
-                    if form.file:
-                        for f in form.list or []:
-                            if f.filename:
-                                files.append((f.filename, f.file.read()))
-                else:
-                    payload = json.loads(body.decode("utf-8"))
-                
-                if self.path == "/api/config":
-                    result = app.update_config(payload)
-                    status = (
-                        HTTPStatus.OK if result.get("ok") else HTTPStatus.BAD_REQUEST
-                    )
-                    _json(self, status, result)
-                    return
+                _json(
+                    self,
+                    HTTPStatus.INTERNAL_SERVER_ERROR,
+                    {"ok": False, "error": str(exc)},
+                )
+            except Exception:  # noqa: BLE001
+                return
 
-                if self.path == "/api/chat":
-                    result = app.chat(payload)
-                    status = (
-                        HTTPStatus.OK if result.get("ok") else HTTPStatus.BAD_REQUEST
-                    )
-                    _json(self, status, result)
-                    return
-                if self.path == "/api/tasks":
-                    result = app.add_task(payload)
-                    status = HTTPStatus.OK if result.get("ok") else HTTPStatus.BAD_REQUEST
-                    _json(self, status, result)
-                    return
-                if self.path == "/api/tasks/delete":
-                    result = app.delete_task(payload)
-                    status = HTTPStatus.OK if result.get("ok") else HTTPStatus.BAD_REQUEST
-                    _json(self, status, result)
-                    return
-                if self.path == "/api/tasks/run_due":
-                    result = app.run_due_once()
-                    _json(self, HTTPStatus.OK, result)
-                    return
+    def _read_body(self, length: int) -> bytes:
+        chunks: list[bytes] = []
+        remaining = length
+        while remaining > 0:
+            buf = self.rfile.read1(remaining)
+            if not buf:
+                break
+            chunks.append(buf)
+            remaining -= len(buf)
+        return b"".join(chunks)
 
-                if self.path == "/api/chat_abort":
-                    result = app.abort(payload)
-                    status = HTTPStatus.OK if result.get("ok") else HTTPStatus.BAD_REQUEST
-                    _json(self, status, result)
-                    return
+    def send_response(self, code: int, message: str | None = None) -> None:
+        self.send_response_only(code, message)
+        self.send_header("Date", _http_date())
 
-                self.send_response(HTTPStatus.OK)
-                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
-                self.send_header("Cache-Control", "no-cache")
-                self.send_header("Connection", "keep-alive")
-                self.end_headers()
-
-                session_id = payload.get("session", "default")
-                app._current_request = {"session": session_id, "aborted": False, "runtime": None}
-                
-                holder: dict[str, Any] = {}
-                done = threading.Event()
-                tool_start_times: dict[str, float] = {}
-
-                def event_forwarder(evt):
-                    phase = evt.get("phase", "")
-                    if phase == "tool_start":
-                        tool_start_times[evt.get("tool_name", "")] = time.time()
-                        _sse(self, {
-                            "type": "tool_start",
-                            "tool_name": evt.get("tool_name", ""),
-                            "tool_index": evt.get("tool_index", 0),
-                            "tool_total": evt.get("tool_total", 0),
-                        })
-                    elif phase == "tool_end":
-                        start_time = tool_start_times.get(evt.get("tool_name", ""))
-                        elapsed = time.time() - start_time if start_time else 0
-                        _sse(self, {
-                            "type": "tool_end",
-                            "tool_name": evt.get("tool_name", ""),
-                            "tool_index": evt.get("tool_index", 0),
-                            "ok": evt.get("ok", False),
-                            "elapsed": round(elapsed, 2),
-                        })
-                    elif phase == "llm_round_start":
-                        _sse(self, {"type": "llm_start", "round": evt.get("round", 0)})
-                    elif phase == "llm_round_end":
-                        _sse(self, {"type": "llm_end", "round": evt.get("round", 0)})
-                    elif phase == "aborted":
-                        _sse(self, {"type": "aborted"})
-
-                def worker() -> None:
-                    try:
-                        def chat_with_callback(p):
-                            result = app.chat(p, event_callback=event_forwarder)
-                            if app._current_request.get("runtime"):
-                                app._current_request["runtime"] = result.get("runtime")
-                            return result
-                        holder["result"] = chat_with_callback(payload)
-                    except Exception as exc:  # noqa: BLE001
-                        holder["error"] = str(exc)
-                    finally:
-                        done.set()
-
-                threading.Thread(target=worker, daemon=True).start()
-
-                tick = 0
-                while not done.is_set():
-                    if app._current_request.get("aborted"):
-                        _sse(self, {"type": "aborted"})
-                        break
-                    _sse(self, {"type": "status", "state": "thinking", "tick": tick})
-                    tick += 1
-                    time.sleep(0.25)
-
-                if "error" in holder:
-                    _sse(self, {"type": "error", "error": holder["error"]})
-                    return
+    def log_request(self, code: int | str = "-", size: int | str = "-") -> None:
+        return
 
-                result = holder.get("result", {"ok": False, "error": "empty result"})
-                if not result.get("ok"):
-                    _sse(
-                        self,
-                        {
-                            "type": "error",
-                            "error": result.get("error", "request failed"),
-                        },
-                    )
-                    return
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
+        return
 
-                cleaned = _clean_reply(str(result.get("reply", "")))
-                for chunk in _chunk_text(cleaned, chunk_size=36):
-                    _sse(self, {"type": "delta", "text": chunk})
-                    time.sleep(0.015)
-                _sse(self, {"type": "done"})
-            except Exception as exc:  # noqa: BLE001
-                try:
-                    _json(
-                        self,
-                        HTTPStatus.INTERNAL_SERVER_ERROR,
-                        {"ok": False, "error": str(exc)},
-                    )
-                except Exception:  # noqa: BLE001
-                    return
 
-        def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
-            return
+class WebServer(ThreadingHTTPServer):
+    request_queue_size = 128
 
-    server = ThreadingHTTPServer((cfg.host, cfg.port), Handler)
+
+def run_web_server(cfg: ServerConfig, client: ChatClient) -> int:
+    app = WebApp(cfg, client)
+    Handler.app = app
+    server = WebServer((cfg.host, cfg.port), Handler)
     print(f"Web client running: http://{cfg.host}:{cfg.port}")
     print("Press Ctrl+C to stop.")
     try:
@@ -1209,7 +1379,10 @@ def run_web_server(cfg: ServerConfig, client: ChatClient) -> int:
         if app._scheduler_thread is not None:
             app._scheduler_thread.join(timeout=2)
         server.server_close()
+        app.close_mcp_pool()
         app.mcp_runtime.close()
+        app.tools.close()
+        app.obs.flush()
     return 0
 
 
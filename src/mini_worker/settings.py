@@ -1,7 +1,20 @@
 import json
-from dataclasses import asdict, dataclass, field
+import os
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+
+_FIELDS: tuple[tuple[str, Callable[[Any], Any]], ...] = (
+    ("provider", str),
+    ("model", str),
+    ("agent", str),
+    ("timeout", int),
+    ("workspace", str),
+    ("session", str),
+    ("no_memory", bool),
+)
+_OPTIONAL_FIELDS = ("base_url", "mcp_config")
 
 
 @dataclass
@@ -20,17 +33,12 @@ class AppSettings:
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "AppSettings":
         settings = cls()
-        settings.provider = str(data.get("provider", settings.provider))
-        settings.model = str(data.get("model", settings.model))
-        base_url = data.get("base_url", settings.base_url)
-        settings.base_url = None if base_url in (None, "") else str(base_url)
-        settings.agent = str(data.get("agent", settings.agent))
-        settings.timeout = int(data.get("timeout", settings.timeout))
-        settings.workspace = str(data.get("workspace", settings.workspace))
-        settings.session = str(data.get("session", settings.session))
-        settings.no_memory = bool(data.get("no_memory", settings.no_memory))
-        mcp_config = data.get("mcp_config", settings.mcp_config)
-        settings.mcp_config = None if mcp_config in (None, "") else str(mcp_config)
+        for name, cast in _FIELDS:
+            if name in data:
+                setattr(settings, name, cast(data[name]))
+        for name in _OPTIONAL_FIELDS:
+            value = data.get(name)
+            setattr(settings, name, None if value in (None, "") else str(value))
 
         raw_keys = data.get("api_keys", {})
         if isinstance(raw_keys, dict):
@@ -40,29 +48,56 @@ class AppSettings:
         return settings
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "base_url": self.base_url,
+            "agent": self.agent,
+            "timeout": self.timeout,
+            "workspace": self.workspace,
+            "session": self.session,
+            "no_memory": self.no_memory,
+            "mcp_config": self.mcp_config,
+            "api_keys": dict(self.api_keys),
+        }
 
 
 class SettingsStore:
     def __init__(self, workspace: str):
         self.workspace = Path(workspace).resolve()
         self.path = self.workspace / ".mini_worker" / "config.json"
+        self._cache: tuple[tuple[int, int], AppSettings] | None = None
 
     def load(self) -> AppSettings:
-        if not self.path.exists():
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
             return AppSettings()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self._cache is not None and self._cache[0] == stamp:
+            return _copy(self._cache[1])
         try:
             raw = self.path.read_text(encoding="utf-8")
             data = json.loads(raw)
             if isinstance(data, dict):
-                return AppSettings.from_dict(data)
+                settings = AppSettings.from_dict(data)
+                self._cache = (stamp, settings)
+                return _copy(settings)
         except Exception:
             return AppSettings()
         return AppSettings()
 
     def save(self, settings: AppSettings) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(
-            json.dumps(settings.to_dict(), ensure_ascii=True, indent=2),
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        tmp.write_text(
+            json.dumps(settings.to_dict(), ensure_ascii=False, indent=2),
             encoding="utf-8",
         )
+        os.replace(tmp, self.path)
+        stat = self.path.stat()
+        self._cache = ((stat.st_mtime_ns, stat.st_size), _copy(settings))
+
+
+def _copy(settings: AppSettings) -> AppSettings:
+    return replace(settings, api_keys=dict(settings.api_keys))
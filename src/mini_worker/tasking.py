@@ -1,13 +1,31 @@
+from __future__ import annotations
+
+import heapq
 import json
+import os
 import threading
 import time
 import uuid
-from dataclasses import asdict, dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+LOG_COMPACT_BYTES = 64 * 1024
 
 
-@dataclass
+@dataclass(slots=True)
 class ScheduledTask:
     id: str
     name: str
@@ -63,18 +81,111 @@ class ScheduledTask:
         )
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "prompt": self.prompt,
+            "provider": self.provider,
+            "model": self.model,
+            "agent": self.agent,
+            "session": self.session,
+            "workspace": self.workspace,
+            "base_url": self.base_url,
+            "interval_seconds": self.interval_seconds,
+            "next_run_at": self.next_run_at,
+            "enabled": self.enabled,
+            "no_memory": self.no_memory,
+            "mcp_config": self.mcp_config,
+            "status": self.status,
+            "step_index": self.step_index,
+            "step_total": self.step_total,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error,
+            "last_reply": self.last_reply,
+            "runs": self.runs,
+            "updated_at": self.updated_at,
+        }
+
+
+class TaskBatch:
+    def __init__(self, tasks: list[ScheduledTask]):
+        self._by_id = {task.id: task for task in tasks}
+        self.events: list[tuple[str, str, dict[str, Any]]] = []
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.events)
+
+    def tasks(self) -> list[ScheduledTask]:
+        return list(self._by_id.values())
+
+    def add(self, task: ScheduledTask) -> None:
+        self._by_id[task.id] = task
+        self.events.append(("add", task.id, task.to_dict()))
+
+    def update(self, task_id: str, **fields: Any) -> ScheduledTask | None:
+        task = self._by_id.get(task_id)
+        if task is None:
+            return None
+        applied: dict[str, Any] = {}
+        for key, value in fields.items():
+            if hasattr(task, key):
+                setattr(task, key, value)
+                applied[key] = value
+        task.updated_at = int(time.time())
+        applied["updated_at"] = task.updated_at
+        self.events.append(("update", task_id, applied))
+        return task
+
+    def delete(self, task_id: str) -> bool:
+        if self._by_id.pop(task_id, None) is None:
+            return False
+        self.events.append(("delete", task_id, {}))
+        return True
 
 
 class TaskStore:
     def __init__(self, workspace: str):
         self.workspace = Path(workspace).resolve()
         self.path = self.workspace / ".mini_worker" / "tasks.json"
+        self.log_path = self.path.with_name("tasks.log.jsonl")
+        self.progress_path = self.path.with_name("progress.json")
         self._lock = threading.Lock()
+        self._lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._cache: dict[str, ScheduledTask] | None = None
+        self._cache_stamp: tuple[Any, Any] | None = None
+        self._due_heap: list[tuple[int, str]] = []
+        self._progress: dict[str, dict[str, int]] = {}
 
     def list(self) -> list[ScheduledTask]:
+        with self._lock, _file_lock(self._lock_path, shared=True):
+            tasks = self._load_unlocked()
+        progress = self._read_progress()
+        if progress:
+            for task in tasks:
+                step = progress.get(task.id)
+                if task.status == "running" and isinstance(step, dict):
+                    task.step_index = int(step.get("step_index", task.step_index))
+                    task.step_total = int(step.get("step_total", task.step_total))
+        return tasks
+
+    def set_progress(self, task_id: str, step_index: int, step_total: int) -> None:
+        with self._lock:
+            self._progress[task_id] = {
+                "step_index": step_index,
+                "step_total": step_total,
+                "ts": int(time.time()),
+            }
+            self.progress_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.progress_path.with_name(f"{self.progress_path.name}.tmp")
+            tmp.write_bytes(_dumps(self._progress))
+            os.replace(tmp, self.progress_path)
+
+    def clear_progress(self) -> None:
         with self._lock:
-            return self._load_unlocked()
+            if self._progress:
+                self._progress.clear()
+                self.progress_path.unlink(missing_ok=True)
 
     def add(
         self,
@@ -108,69 +219,194 @@ class TaskStore:
             mcp_config=mcp_config,
             updated_at=now,
         )
-        with self._lock:
-            tasks = self._load_unlocked()
-            tasks.append(task)
-            self._save_unlocked(tasks)
+        with self.batch() as batch:
+            batch.add(task)
         return task
 
     def delete(self, task_id: str) -> bool:
-        with self._lock:
-            tasks = self._load_unlocked()
-            remain = [t for t in tasks if t.id != task_id]
-            if len(remain) == len(tasks):
-                return False
-            self._save_unlocked(remain)
-            return True
+        with self.batch() as batch:
+            return batch.delete(task_id)
 
     def update(self, task_id: str, **fields: Any) -> ScheduledTask | None:
-        with self._lock:
-            tasks = self._load_unlocked()
-            found: ScheduledTask | None = None
-            for task in tasks:
-                if task.id != task_id:
-                    continue
-                found = task
-                for key, value in fields.items():
-                    if hasattr(task, key):
-                        setattr(task, key, value)
-                task.updated_at = int(time.time())
-                break
-            if found is None:
-                return None
-            self._save_unlocked(tasks)
-            return found
+        with self.batch() as batch:
+            return batch.update(task_id, **fields)
+
+    @contextmanager
+    def batch(self) -> Iterator[TaskBatch]:
+        with self._lock, _file_lock(self._lock_path):
+            batch = TaskBatch(self._load_unlocked())
+            yield batch
+            if not batch.changed:
+                return
+            size = self._append_unlocked(batch.events)
+            if size > LOG_COMPACT_BYTES:
+                self._save_unlocked(batch.tasks())
+            else:
+                self._set_cache(batch.tasks())
+
+    def compact(self) -> None:
+        with self._lock, _file_lock(self._lock_path):
+            self._save_unlocked(self._load_unlocked())
 
     def due(self, now_ts: int | None = None) -> list[ScheduledTask]:
         now = now_ts or int(time.time())
-        tasks = self.list()
-        return [
-            task
-            for task in tasks
-            if task.enabled and task.status != "running" and task.next_run_at <= now
-        ]
+        with self._lock, _file_lock(self._lock_path, shared=True):
+            cache = self._refresh_unlocked()
+            heap = self._due_heap
+            popped: list[tuple[int, str]] = []
+            out: list[ScheduledTask] = []
+            while heap and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                popped.append(entry)
+                task = cache[entry[1]]
+                if task.enabled and task.status != "running":
+                    out.append(replace(task))
+            for entry in popped:
+                heapq.heappush(heap, entry)
+            return out
+
+    def _read_progress(self) -> dict[str, Any]:
+        try:
+            payload = _loads(self.progress_path.read_bytes())
+        except Exception:
+            return {}
+        return payload if isinstance(payload, dict) else {}
+
+    def _stamp(self) -> tuple[Any, Any]:
+        return (_stat_stamp(self.path), _stat_stamp(self.log_path))
+
+    def _set_cache(self, tasks: list[ScheduledTask], stamp: tuple[Any, Any] | None = None) -> None:
+        self._cache = {t.id: replace(t) for t in tasks}
+        self._cache_stamp = self._stamp() if stamp is None else stamp
+        self._due_heap = [(t.next_run_at, t.id) for t in tasks]
+        heapq.heapify(self._due_heap)
 
     def _load_unlocked(self) -> list[ScheduledTask]:
-        if not self.path.exists():
-            return []
+        return [replace(t) for t in self._refresh_unlocked().values()]
+
+    def _refresh_unlocked(self) -> dict[str, ScheduledTask]:
+        stamp = self._stamp()
+        if self._cache is None or self._cache_stamp != stamp:
+            self._set_cache(self._read_unlocked(), stamp)
+        return self._cache
+
+    def _read_unlocked(self) -> list[ScheduledTask]:
+        by_id: dict[str, ScheduledTask] = {}
         try:
-            payload = json.loads(self.path.read_text(encoding="utf-8"))
+            payload = _loads(self.path.read_bytes())
+        except FileNotFoundError:
+            payload = []
         except Exception:
             return []
         if not isinstance(payload, list):
             return []
-        out: list[ScheduledTask] = []
         for item in payload:
             if isinstance(item, dict):
-                out.append(ScheduledTask.from_dict(item))
-        return out
+                task = ScheduledTask.from_dict(item)
+                by_id[task.id] = task
+        try:
+            log = self.log_path.read_bytes()
+        except FileNotFoundError:
+            log = b""
+        for line in log.splitlines():
+            try:
+                event = _loads(line)
+            except Exception:
+                continue
+            if isinstance(event, dict):
+                _apply_event(by_id, event)
+        return list(by_id.values())
+
+    def _append_unlocked(self, events: list[tuple[str, str, dict[str, Any]]]) -> int:
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        now = int(time.time())
+        raw = b"".join(
+            _dump_line({"op": kind, "id": task_id, "fields": fields, "ts": now})
+            for kind, task_id, fields in events
+        )
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, raw)
+            return os.fstat(fd).st_size
+        finally:
+            os.close(fd)
 
     def _save_unlocked(self, tasks: list[ScheduledTask]) -> None:
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(
-            json.dumps([t.to_dict() for t in tasks], ensure_ascii=True, indent=2),
-            encoding="utf-8",
-        )
+        raw = _dumps([t.to_dict() for t in tasks])
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        tmp.write_bytes(raw)
+        os.replace(tmp, self.path)
+        self.log_path.unlink(missing_ok=True)
+        self._set_cache(tasks)
+
+
+def _stat_stamp(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _apply_event(by_id: dict[str, ScheduledTask], event: dict[str, Any]) -> None:
+    op = event.get("op")
+    task_id = event.get("id")
+    fields = event.get("fields")
+    if not isinstance(task_id, str) or not isinstance(fields, dict):
+        return
+    if op == "add":
+        by_id[task_id] = ScheduledTask.from_dict(fields)
+    elif op == "delete":
+        by_id.pop(task_id, None)
+    elif op == "update":
+        task = by_id.get(task_id)
+        if task is None:
+            return
+        for key, value in fields.items():
+            if hasattr(task, key):
+                setattr(task, key, value)
+
+
+@contextmanager
+def _file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=True, indent=2).encode("ascii")
+
+
+def _dump_line(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(data, ensure_ascii=True, separators=(",", ":")).encode("ascii") + b"\n"
+
+
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity are accepted by the stdlib parser but not by orjson.
+            pass
+    return json.loads(raw)
 
 
 def run_due_tasks(
@@ -181,63 +417,63 @@ def run_due_tasks(
 ) -> int:
     due_tasks = store.due()
     executed = 0
-    for task in due_tasks:
-        executed += 1
-        store.update(
-            task.id,
-            status="running",
-            step_index=0,
-            step_total=1,
-            last_error=None,
-            last_reply=None,
-            last_run_at=int(time.time()),
-        )
-        if on_event:
-            on_event("task_started", {"task_id": task.id, "name": task.name})
-
-        def progress(evt: dict[str, Any]) -> None:
-            phase = str(evt.get("phase", ""))
-            if phase == "tool_start":
-                current = int(evt.get("tool_index", 0))
-                total = max(1, int(evt.get("tool_total", 1)))
-                store.update(task.id, step_index=current, step_total=total, status="running")
+    finished: tuple[str, dict[str, Any]] | None = None
+    try:
+        for task in due_tasks:
+            executed += 1
+            with store.batch() as batch:
+                if finished is not None:
+                    batch.update(finished[0], **finished[1])
+                    finished = None
+                batch.update(
+                    task.id,
+                    status="running",
+                    step_index=0,
+                    step_total=1,
+                    last_error=None,
+                    last_reply=None,
+                    last_run_at=int(time.time()),
+                )
             if on_event:
-                on_event("task_progress", {"task_id": task.id, **evt})
+                on_event("task_started", {"task_id": task.id, "name": task.name})
+
+            def progress(evt: dict[str, Any]) -> None:
+                phase = str(evt.get("phase", ""))
+                if phase == "tool_start":
+                    current = int(evt.get("tool_index", 0))
+                    total = max(1, int(evt.get("tool_total", 1)))
+                    store.set_progress(task.id, current, total)
+                if on_event:
+                    on_event("task_progress", {"task_id": task.id, **evt})
 
-        ok = False
-        detail = ""
-        try:
-            ok, detail = runner(task, progress)
-        except Exception as exc:  # noqa: BLE001
             ok = False
-            detail = f"{type(exc).__name__}: {exc}"
+            detail = ""
+            try:
+                ok, detail = runner(task, progress)
+            except Exception as exc:  # noqa: BLE001
+                ok = False
+                detail = f"{type(exc).__name__}: {exc}"
 
-        now = int(time.time())
-        if ok:
-            store.update(
-                task.id,
-                status="idle",
-                step_index=1,
-                step_total=1,
-                last_reply=detail,
-                last_error=None,
-                runs=task.runs + 1,
-                next_run_at=now + max(10, task.interval_seconds),
-                last_run_at=now,
-            )
-            if on_event:
+            # The final state is written together with the next task's start.
+            now = int(time.time())
+            fields: dict[str, Any] = {
+                "step_total": 1,
+                "runs": task.runs + 1,
+                "next_run_at": now + max(10, task.interval_seconds),
+                "last_run_at": now,
+            }
+            if ok:
+                fields.update(status="idle", step_index=1, last_reply=detail, last_error=None)
+            else:
+                fields.update(status="error", step_index=0, last_error=detail)
+            finished = (task.id, fields)
+            if on_event and ok:
                 on_event("task_succeeded", {"task_id": task.id, "name": task.name})
-        else:
-            store.update(
-                task.id,
-                status="error",
-                step_index=0,
-                step_total=1,
-                last_error=detail,
-                runs=task.runs + 1,
-                next_run_at=now + max(10, task.interval_seconds),
-                last_run_at=now,
-            )
-            if on_event:
+            elif on_event:
                 on_event("task_failed", {"task_id": task.id, "name": task.name, "error": detail})
+    finally:
+        # Also reached when on_event raises, so a finished task never stays running.
+        if finished is not None:
+            store.update(finished[0], **finished[1])
+        store.clear_progress()
     return executed
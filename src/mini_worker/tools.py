@@ -1,22 +1,302 @@
+import atexit
+import errno
+import fnmatch
+import functools
+import itertools
 import json
 import os
 import re
+import shlex
+import shutil
+import signal
 import subprocess
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from fnmatch import fnmatch
 from pathlib import Path
-from typing import Any, Callable
-from urllib import request
+from typing import IO, Any, Callable, Iterator
+from urllib import parse, request
 
 from .security import SecurityPolicy
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
+
+# One attempt and up to 10 redirects, as with urlopen.
+_FETCH_RETRIES = (
+    urllib3.Retry(total=None, connect=0, read=0, status=0, other=0, redirect=10)
+    if urllib3 is not None
+    else None
+)
+
+_GREP_BATCH = 32
+_GREP_WORKERS = 4
+_GREP_BUFFER_CHARS = 1024 * 1024
+_GREP_RG_TIMEOUT = 30
+_LINE_SENSITIVE_RE = re.compile(r"\\[AZ]|\(\?<?[=!]")
+_SHELL_TAIL_CHARS = 12000
+_SHELL_TAIL_BYTES = _SHELL_TAIL_CHARS * 4
+_MCP_UNSAFE_RE = re.compile(r"[^a-zA-Z0-9_]")
+_FETCH_HEADERS = {"User-Agent": "mini-worker/0.1", "Accept-Encoding": "identity"}
+_PLAYWRIGHT_DRIVER = r"""
+const readline = require("readline");
+let browserPromise = null;
+function browser() {
+  if (!browserPromise) {
+    const { chromium } = require("playwright");
+    browserPromise = chromium.launch({ headless: true }).catch((err) => {
+      browserPromise = null;
+      throw err;
+    });
+  }
+  return browserPromise;
+}
+async function handle(payload) {
+  const page = await (await browser()).newPage();
+  try {
+    await page.goto(payload.url, { waitUntil: "domcontentloaded", timeout: payload.timeoutMs });
+    if (payload.selector) {
+      await page.waitForSelector(payload.selector, { timeout: payload.timeoutMs });
+    }
+    if (payload.action === "screenshot") {
+      await page.screenshot({ path: payload.screenshotPath, fullPage: true });
+      return { ok: true, mode: "screenshot", path: payload.screenshotPath };
+    }
+    const text = await page.evaluate((selector) => {
+      const node = selector ? document.querySelector(selector) : document.body;
+      if (!node) return "";
+      return (node.innerText || "").trim();
+    }, payload.selector || null);
+    return { ok: true, mode: "content", text: String(text || "").slice(0, payload.maxChars) };
+  } finally {
+    await page.close();
+  }
+}
+let queue = Promise.resolve();
+const rl = readline.createInterface({ input: process.stdin });
+rl.on("line", (line) => {
+  queue = queue.then(async () => {
+    let result;
+    try {
+      result = await handle(JSON.parse(line));
+    } catch (err) {
+      result = { ok: false, error: err && err.stack ? err.stack : String(err) };
+    }
+    process.stdout.write(JSON.stringify(result) + "\n");
+  });
+});
+rl.on("close", async () => {
+  await queue;
+  if (browserPromise) {
+    try {
+      await (await browserPromise).close();
+    } catch (err) {}
+  }
+  process.exit(0);
+});
+""".strip()
+_PLAYWRIGHT_WORKERS: weakref.WeakSet[subprocess.Popen[bytes]] = weakref.WeakSet()
+_SHELL_META = frozenset("|&;<>()$`\\\"'*?[]{}#~=%!\n")
+# Shell builtins and keywords; several also exist as binaries (echo, printf, test,
+# pwd, kill, time) that behave differently, so these always go through /bin/sh.
+_SHELL_BUILTINS = frozenset(
+    {".", ":", "alias", "bg", "break", "cd", "command", "continue", "declare", "echo",
+     "eval", "exec", "exit", "export", "false", "fc", "fg", "getopts", "hash", "jobs",
+     "kill", "let", "local", "printf", "pwd", "read", "readonly", "return", "set",
+     "shift", "source", "test", "time", "times", "trap", "true", "type", "typeset",
+     "ulimit", "umask", "unalias", "unset", "wait"}
+)
+
 
 def _safe_join(root: Path, value: str) -> Path:
-    candidate = (root / value).resolve()
-    root_resolved = root.resolve()
-    if root_resolved not in candidate.parents and candidate != root_resolved:
+    # `root` must already be resolved; ToolRegistry resolves its workspace once.
+    root_str = str(root)
+    joined = os.path.normpath(os.path.join(root_str, value))
+    if joined == root_str:
+        return root
+    if os.path.commonpath([joined, root_str]) != root_str:
+        raise ValueError("Path escapes workspace")
+    candidate = os.path.realpath(joined)
+    if os.path.commonpath([candidate, root_str]) != root_str:
         raise ValueError("Path escapes workspace")
-    return candidate
+    return Path(candidate)
+
+
+def _grep_file(
+    root: str,
+    regex: re.Pattern[str],
+    buffer_regex: re.Pattern[str] | None,
+    limit: int,
+    rel: str,
+) -> list[str]:
+    hits: list[str] = []
+    try:
+        with open(os.path.join(root, rel), encoding="utf-8") as fh:
+            if buffer_regex is not None:
+                text = fh.read(_GREP_BUFFER_CHARS + 1)
+                if len(text) <= _GREP_BUFFER_CHARS:
+                    return _grep_buffer(text, rel, regex, buffer_regex, limit)
+                fh.seek(0)
+            for idx, raw_line in enumerate(fh, start=1):
+                line = raw_line.rstrip("\n")
+                if regex.search(line):
+                    hits.append(f"{rel}:{idx}: {line[:300]}")
+                    if len(hits) >= limit:
+                        # Files that are not valid UTF-8 are skipped entirely,
+                        # so the rest still has to decode.
+                        for _ in fh:
+                            pass
+                        break
+    except Exception:
+        return []
+    return hits
+
+
+def _grep_buffer(
+    text: str,
+    rel: str,
+    regex: re.Pattern[str],
+    buffer_regex: re.Pattern[str],
+    limit: int,
+) -> list[str]:
+    # buffer_regex finds candidate lines in one pass; regex confirms each line on its own.
+    hits: list[str] = []
+    end = len(text)
+    pos = 0
+    counted = 0
+    line_no = 1
+    while len(hits) < limit:
+        match = buffer_regex.search(text, pos)
+        if match is None:
+            break
+        start = text.rfind("\n", 0, match.start()) + 1
+        if start >= end:
+            break
+        stop = text.find("\n", match.start())
+        if stop < 0:
+            stop = end
+        line_no += text.count("\n", counted, start)
+        counted = start
+        line = text[start:stop]
+        if regex.search(line):
+            hits.append(f"{rel}:{line_no}: {line[:300]}")
+        pos = stop + 1
+        if pos > end:
+            break
+    return hits
+
+
+def _drain_tail(stream: IO[bytes], tail: bytearray) -> None:
+    try:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            tail += chunk
+            if len(tail) > 2 * _SHELL_TAIL_BYTES:
+                del tail[:-_SHELL_TAIL_BYTES]
+    except (OSError, ValueError):
+        pass
+
+
+def _stop_worker(proc: subprocess.Popen[bytes]) -> None:
+    # Closing stdin ends the driver's readline loop, which closes the browser and exits.
+    try:
+        proc.stdin.close()
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    proc.stdout.close()
+
+
+@atexit.register
+def _kill_playwright_workers() -> None:
+    for proc in list(_PLAYWRIGHT_WORKERS):
+        proc.kill()
+
+
+def _kill_group(proc: subprocess.Popen[bytes]) -> None:
+    # The pipes are left open: readers may still be blocked on them if something
+    # in the group survives, and closing them would wait on those readers.
+    if os.name == "posix":
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+    proc.kill()
+    proc.wait()
+
+
+def _tail_text(tail: bytearray) -> str:
+    text = bytes(tail[-_SHELL_TAIL_BYTES:]).decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")[-_SHELL_TAIL_CHARS:]
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern: str) -> re.Pattern[str]:
+    # Same semantics as fnmatch.fnmatch, but the pattern is normalised once per compile.
+    flags = re.IGNORECASE if os.name == "nt" else 0
+    return re.compile(fnmatch.translate(os.path.normcase(pattern)), flags)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_regex(pattern: str) -> re.Pattern[str]:
+    return re.compile(pattern)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_buffer_regex(pattern: str) -> re.Pattern[str] | None:
+    # Anchors and lookarounds can see across line breaks in a whole-file buffer.
+    if _LINE_SENSITIVE_RE.search(pattern):
+        return None
+    return re.compile(pattern, re.MULTILINE)
+
+
+def _dumps(data: Any, indent: int | None = None) -> bytes:
+    if orjson is not None and indent in (None, 2):
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=True, indent=indent).encode("ascii")
+
+
+def _loads(raw: bytes | str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity are accepted by the stdlib parser but not by orjson.
+            pass
+    return json.loads(raw)
+
+
+def _walk_files(root: str, prefix: str) -> Iterator[tuple[str, str]]:
+    stack = [(root, prefix)]
+    while stack:
+        path, rel = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs: list[tuple[str, str]] = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append((entry.path, f"{rel}{entry.name}{os.sep}"))
+            elif entry.is_file():
+                yield f"{rel}{entry.name}", entry.name
+        stack.extend(reversed(subdirs))
 
 
 @dataclass
@@ -36,11 +316,38 @@ class ToolSpec:
 class ToolRegistry:
     def __init__(self, workspace: str | None = None):
         self.workspace = Path(workspace or os.getcwd()).resolve()
+        self._ws_str = str(self.workspace)
+        self._ws_prefix = self._ws_str.rstrip(os.sep) + os.sep
         self.security = SecurityPolicy.load(str(self.workspace))
         self._tools: dict[str, ToolSpec] = {}
+        self._handlers: dict[str, Callable[[dict[str, Any]], ToolCallResult]] = {}
+        self._schemas: list[dict[str, Any]] | None = None
+        self._schemas_json: str | None = None
+        self._http: dict[str, Any] = {}
+        self._pw_proc: subprocess.Popen[bytes] | None = None
+        self._pw_lock = threading.Lock()
+        self._rg = shutil.which("rg")
         self._register_builtin_tools()
 
+    def _rel(self, path: Path) -> str:
+        value = str(path)
+        if value == self._ws_str:
+            return "."
+        if value.startswith(self._ws_prefix):
+            return value[len(self._ws_prefix):]
+        return value
+
     def schemas(self) -> list[dict[str, Any]]:
+        if self._schemas is None:
+            self._schemas = self._build_schemas()
+        return self._schemas
+
+    def schemas_json(self) -> str:
+        if self._schemas_json is None:
+            self._schemas_json = _dumps(self.schemas()).decode("utf-8")
+        return self._schemas_json
+
+    def _build_schemas(self) -> list[dict[str, Any]]:
         return [
             {
                 "type": "function",
@@ -63,12 +370,15 @@ class ToolRegistry:
     ) -> None:
         if name in self._tools:
             raise ValueError(f"Tool already exists: {name}")
+        self._schemas = None
+        self._schemas_json = None
         self._tools[name] = ToolSpec(
             name=name,
             description=description,
             parameters=parameters,
             handler=handler,
         )
+        self._handlers[name] = handler
 
     def add_mcp_tool(
         self,
@@ -79,8 +389,8 @@ class ToolRegistry:
         parameters: dict[str, Any],
         handler: Callable[[dict[str, Any]], ToolCallResult],
     ) -> str:
-        safe_server = re.sub(r"[^a-zA-Z0-9_]", "_", mcp_server).strip("_").lower()
-        safe_tool = re.sub(r"[^a-zA-Z0-9_]", "_", mcp_tool_name).strip("_").lower()
+        safe_server = _MCP_UNSAFE_RE.sub("_", mcp_server).strip("_").lower()
+        safe_tool = _MCP_UNSAFE_RE.sub("_", mcp_tool_name).strip("_").lower()
         tool_name = f"mcp_{safe_server}_{safe_tool}"
         self.register_tool(
             name=tool_name,
@@ -91,11 +401,11 @@ class ToolRegistry:
         return tool_name
 
     def call(self, name: str, args: dict[str, Any]) -> ToolCallResult:
-        spec = self._tools.get(name)
-        if spec is None:
+        handler = self._handlers.get(name)
+        if handler is None:
             return ToolCallResult(False, f"Unknown tool: {name}")
         try:
-            return spec.handler(args)
+            return handler(args)
         except Exception as exc:  # noqa: BLE001
             return ToolCallResult(False, f"{type(exc).__name__}: {exc}")
 
@@ -230,7 +540,13 @@ class ToolRegistry:
             description="Read a JSON file from workspace",
             parameters={
                 "type": "object",
-                "properties": {"path": {"type": "string"}},
+                "properties": {
+                    "path": {"type": "string"},
+                    "reformat": {
+                        "type": "boolean",
+                        "description": "Re-indent the JSON instead of returning it verbatim",
+                    },
+                },
                 "required": ["path"],
             },
             handler=self._read_json,
@@ -278,18 +594,19 @@ class ToolRegistry:
         if not target.exists():
             return ToolCallResult(False, f"Path not found: {target}")
         if target.is_file():
-            return ToolCallResult(True, str(target.relative_to(self.workspace)))
+            return ToolCallResult(True, self._rel(target))
 
-        entries = []
-        for child in sorted(target.iterdir()):
-            mark = "/" if child.is_dir() else ""
-            entries.append(f"{child.relative_to(self.workspace)}{mark}")
+        prefix = "" if target == self.workspace else f"{self._rel(target)}{os.sep}"
+        with os.scandir(target) as it:
+            children = sorted(it, key=lambda entry: entry.name)
+        entries = [f"{prefix}{entry.name}{'/' if entry.is_dir() else ''}" for entry in children]
         return ToolCallResult(True, "\n".join(entries) if entries else "(empty)")
 
     def _read_file(self, args: dict[str, Any]) -> ToolCallResult:
         target = _safe_join(self.workspace, args["path"])
         max_chars = int(args.get("max_chars", 20000))
-        content = target.read_text(encoding="utf-8")
+        with target.open("r", encoding="utf-8") as fh:
+            content = fh.read(max_chars + 1)
         if len(content) > max_chars:
             content = content[:max_chars] + "\n...[truncated]"
         return ToolCallResult(True, content)
@@ -305,7 +622,7 @@ class ToolRegistry:
             written = fh.write(content)
         return ToolCallResult(
             True,
-            f"Wrote file: {target.relative_to(self.workspace)} ({written} chars)",
+            f"Wrote file: {self._rel(target)} ({written} chars)",
         )
 
     def _run_shell(self, args: dict[str, Any]) -> ToolCallResult:
@@ -314,20 +631,55 @@ class ToolRegistry:
         allowed, reason = self.security.check_shell(command=command, timeout=timeout)
         if not allowed:
             return ToolCallResult(False, reason or "Command blocked by policy")
-        proc = subprocess.run(
-            command,
+        argv = None if _SHELL_META.intersection(command) else shlex.split(command)
+        if argv and argv[0] not in _SHELL_BUILTINS:
+            try:
+                result = self._capture(argv, False, timeout)
+            except OSError as exc:
+                # Missing, non-executable or shebang-less scripts: let /bin/sh handle
+                # them exactly as it did before the direct exec path existed.
+                if exc.errno not in (errno.ENOENT, errno.EACCES, errno.EPERM, errno.ENOEXEC):
+                    raise
+                result = self._capture(command, True, timeout)
+        else:
+            result = self._capture(command, True, timeout)
+        exit_code, stdout, stderr = result
+        payload = {"exit_code": exit_code, "stdout": stdout, "stderr": stderr}
+        return ToolCallResult(True, _dumps(payload).decode("utf-8"))
+
+    def _capture(self, cmd: str | list[str], shell: bool, timeout: int) -> tuple[int, str, str]:
+        deadline = time.monotonic() + timeout
+        proc = subprocess.Popen(
+            cmd,
             cwd=str(self.workspace),
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
+            shell=shell,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
         )
-        payload = {
-            "exit_code": proc.returncode,
-            "stdout": proc.stdout[-12000:],
-            "stderr": proc.stderr[-12000:],
-        }
-        return ToolCallResult(True, json.dumps(payload, ensure_ascii=True))
+        tails = (bytearray(), bytearray())
+        readers = [
+            threading.Thread(target=_drain_tail, args=(stream, tail), daemon=True)
+            for stream, tail in zip((proc.stdout, proc.stderr), tails)
+        ]
+        for reader in readers:
+            reader.start()
+        try:
+            # One deadline covers the pipes and the process; a background grandchild
+            # holding a pipe open must not outlive the timeout.
+            for reader in readers:
+                reader.join(max(0.0, deadline - time.monotonic()))
+            if any(reader.is_alive() for reader in readers):
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            _kill_group(proc)
+            raise subprocess.TimeoutExpired(
+                cmd if isinstance(cmd, str) else shlex.join(cmd), timeout
+            ) from None
+        proc.stdout.close()
+        proc.stderr.close()
+        return proc.returncode, _tail_text(tails[0]), _tail_text(tails[1])
 
     def _find_files(self, args: dict[str, Any]) -> ToolCallResult:
         root = _safe_join(self.workspace, args.get("path", "."))
@@ -336,42 +688,99 @@ class ToolRegistry:
         if not root.exists() or not root.is_dir():
             return ToolCallResult(False, f"Path not found or not directory: {root}")
 
+        matcher = _compile_glob(pattern).match
+        prefix = "" if root == self.workspace else f"{self._rel(root)}{os.sep}"
         matches: list[str] = []
-        for candidate in root.rglob("*"):
-            if not candidate.is_file():
-                continue
-            rel = str(candidate.relative_to(self.workspace))
-            if fnmatch(rel, pattern) or fnmatch(candidate.name, pattern):
+        for rel, name in _walk_files(str(root), prefix):
+            if matcher(rel) or matcher(name):
                 matches.append(rel)
-            if len(matches) >= limit:
-                break
+                if len(matches) >= limit:
+                    break
         return ToolCallResult(True, "\n".join(matches) if matches else "(no matches)")
 
     def _grep_text(self, args: dict[str, Any]) -> ToolCallResult:
         root = _safe_join(self.workspace, args.get("path", "."))
-        regex = re.compile(str(args["pattern"]))
+        regex = _compile_regex(str(args["pattern"]))
         include = str(args.get("include", "*"))
         limit = int(args.get("limit", 200))
         if not root.exists() or not root.is_dir():
             return ToolCallResult(False, f"Path not found or not directory: {root}")
 
-        hits: list[str] = []
-        for candidate in root.rglob("*"):
-            if not candidate.is_file() or not fnmatch(candidate.name, include):
-                continue
-            try:
-                text = candidate.read_text(encoding="utf-8")
-            except Exception:
-                continue
+        if self._rg is not None:
+            rg_hits = self._grep_rg(root, str(args["pattern"]), include, limit)
+            if rg_hits is not None:
+                return ToolCallResult(True, "\n".join(rg_hits) if rg_hits else "(no matches)")
 
-            for idx, line in enumerate(text.splitlines(), start=1):
-                if regex.search(line):
-                    rel = str(candidate.relative_to(self.workspace))
-                    hits.append(f"{rel}:{idx}: {line[:300]}")
+        include_match = _compile_glob(include).match
+        prefix = "" if root == self.workspace else f"{self._rel(root)}{os.sep}"
+        files = (rel for rel, name in _walk_files(str(root), prefix) if include_match(name))
+        scan = functools.partial(
+            _grep_file, self._ws_str, regex, _compile_buffer_regex(regex.pattern), limit
+        )
+        hits: list[str] = []
+        # Files are read in parallel batches so their I/O overlaps; results keep walk order.
+        with ThreadPoolExecutor(max_workers=_GREP_WORKERS) as pool:
+            while len(hits) < limit:
+                batch = list(itertools.islice(files, _GREP_BATCH))
+                if not batch:
+                    break
+                for found in pool.map(scan, batch):
+                    hits.extend(found)
                     if len(hits) >= limit:
-                        return ToolCallResult(True, "\n".join(hits))
+                        break
+        del hits[limit:]
         return ToolCallResult(True, "\n".join(hits) if hits else "(no matches)")
 
+    def _grep_rg(
+        self, root: Path, pattern: str, include: str, limit: int
+    ) -> list[str] | None:
+        cmd = [
+            self._rg,
+            "--null",
+            "--line-number",
+            "--no-heading",
+            "--no-ignore",
+            "--hidden",
+            "--color=never",
+            "--max-count",
+            str(limit),
+            "--glob",
+            include,
+            "--regexp",
+            pattern,
+        ]
+        if root != self.workspace:
+            cmd.append(self._rel(root))
+        hits: list[str] = []
+        with subprocess.Popen(
+            cmd,
+            cwd=str(self.workspace),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        ) as proc:
+            timer = threading.Timer(_GREP_RG_TIMEOUT, proc.kill)
+            timer.start()
+            try:
+                for raw in proc.stdout:
+                    path, _, rest = raw.rstrip(b"\r\n").partition(b"\0")
+                    lineno, _, line = rest.partition(b":")
+                    rel = path.decode("utf-8", errors="replace")
+                    text = line.decode("utf-8", errors="replace")
+                    hits.append(f"{rel}:{int(lineno)}: {text[:300]}")
+                    if len(hits) >= limit:
+                        proc.kill()
+                        break
+            finally:
+                timed_out = not timer.is_alive()
+                timer.cancel()
+        if timed_out and len(hits) < limit:
+            hits.append(f"...[grep timed out after {_GREP_RG_TIMEOUT}s]")
+            return hits
+        if len(hits) < limit and proc.returncode not in (0, 1):
+            return None
+        return hits
+
     def _fetch_url(self, args: dict[str, Any]) -> ToolCallResult:
         url = str(args["url"]).strip()
         allowed, reason = self.security.check_url(url)
@@ -383,32 +792,78 @@ class ToolRegistry:
             int(args.get("max_chars", 30000)),
             int(self.security.max_fetch_chars),
         )
-        req = request.Request(
-            url=url,
-            method="GET",
-            headers={"User-Agent": "mini-worker/0.1"},
+        cap = max_chars * 4 + 16
+        pool = self._http_pool(url) if urllib3 is not None else None
+        if pool is not None:
+            raw = self._fetch_pooled(pool, url, timeout, cap)
+        else:
+            req = request.Request(url=url, method="GET", headers=_FETCH_HEADERS)
+            with request.urlopen(req, timeout=timeout) as resp:
+                raw = resp.read(cap)
+        body = raw.decode("utf-8", errors="replace")
+        if len(body) > max_chars:
+            body = body[:max_chars] + "\n...[truncated]"
+        return ToolCallResult(True, body)
+
+    def _http_pool(self, url: str) -> Any:
+        # Mirror urlopen's proxy selection; proxies urllib3 cannot take as a
+        # plain URL (credentials, SOCKS) stay on the stdlib path.
+        parts = parse.urlsplit(url)
+        proxy = request.getproxies().get(parts.scheme, "")
+        if proxy and parts.hostname and request.proxy_bypass(parts.hostname):
+            proxy = ""
+        if proxy:
+            if "://" not in proxy:
+                proxy = "http://" + proxy
+            proxy_parts = parse.urlsplit(proxy)
+            if proxy_parts.scheme not in ("http", "https") or proxy_parts.username:
+                return None
+        pool = self._http.get(proxy)
+        if pool is None:
+            if proxy:
+                pool = urllib3.ProxyManager(proxy, num_pools=8, maxsize=4, headers=_FETCH_HEADERS)
+            else:
+                pool = urllib3.PoolManager(num_pools=8, maxsize=4, headers=_FETCH_HEADERS)
+            self._http[proxy] = pool
+        return pool
+
+    def _fetch_pooled(self, pool: Any, url: str, timeout: int, cap: int) -> bytes:
+        resp = pool.request(
+            "GET", url, timeout=timeout, retries=_FETCH_RETRIES, preload_content=False
         )
-        with request.urlopen(req, timeout=timeout) as resp:
-            body = resp.read().decode("utf-8", errors="replace")
-            if len(body) > max_chars:
-                body = body[:max_chars] + "\n...[truncated]"
-            return ToolCallResult(True, body)
+        try:
+            if resp.status >= 400:
+                raise ValueError(f"HTTP Error {resp.status}: {resp.reason}")
+            raw = resp.read(cap)
+        except BaseException:
+            resp.close()
+            raise
+        # A partially read body would poison the pooled connection.
+        if len(raw) < cap:
+            resp.release_conn()
+        else:
+            resp.close()
+        return raw
 
     def _read_json(self, args: dict[str, Any]) -> ToolCallResult:
         target = _safe_join(self.workspace, args["path"])
-        data = json.loads(target.read_text(encoding="utf-8"))
-        return ToolCallResult(True, json.dumps(data, ensure_ascii=True, indent=2))
+        raw = target.read_bytes()
+        data = _loads(raw)
+        if bool(args.get("reformat", False)):
+            if b"NaN" in raw or b"Infinity" in raw:
+                # orjson would write non-finite floats as null.
+                raw = json.dumps(data, ensure_ascii=True, indent=2).encode("ascii")
+            else:
+                raw = _dumps(data, indent=2)
+        return ToolCallResult(True, raw.decode("utf-8"))
 
     def _write_json(self, args: dict[str, Any]) -> ToolCallResult:
         target = _safe_join(self.workspace, args["path"])
         target.parent.mkdir(parents=True, exist_ok=True)
         indent = int(args.get("indent", 2))
-        target.write_text(
-            json.dumps(args["data"], ensure_ascii=True, indent=indent),
-            encoding="utf-8",
-        )
+        target.write_bytes(_dumps(args["data"], indent=indent))
         return ToolCallResult(
-            True, f"Wrote JSON file: {target.relative_to(self.workspace)}"
+            True, f"Wrote JSON file: {self._rel(target)}"
         )
 
     def _playwright_browse(self, args: dict[str, Any]) -> ToolCallResult:
@@ -442,60 +897,54 @@ class ToolRegistry:
             "screenshotPath": str(screenshot_path),
             "timeoutMs": timeout * 1000,
         }
-        js = r"""
-const payload = JSON.parse(process.env.MW_PLAYWRIGHT_PAYLOAD || "{}");
-async function main() {
-  const { chromium } = require("playwright");
-  const browser = await chromium.launch({ headless: true });
-  const page = await browser.newPage();
-  await page.goto(payload.url, { waitUntil: "domcontentloaded", timeout: payload.timeoutMs });
-  if (payload.selector) {
-    await page.waitForSelector(payload.selector, { timeout: payload.timeoutMs });
-  }
-  if (payload.action === "screenshot") {
-    await page.screenshot({ path: payload.screenshotPath, fullPage: true });
-    console.log(JSON.stringify({ ok: true, mode: "screenshot", path: payload.screenshotPath }));
-  } else {
-    const text = await page.evaluate((selector) => {
-      const node = selector ? document.querySelector(selector) : document.body;
-      if (!node) return "";
-      return (node.innerText || "").trim();
-    }, payload.selector || null);
-    console.log(JSON.stringify({ ok: true, mode: "content", text: String(text || "").slice(0, payload.maxChars) }));
-  }
-  await browser.close();
-}
-main().catch((err) => {
-  console.error(err && err.stack ? err.stack : String(err));
-  process.exit(1);
-});
-""".strip()
-        env = dict(os.environ)
-        env["MW_PLAYWRIGHT_PAYLOAD"] = json.dumps(payload, ensure_ascii=True)
-        proc = subprocess.run(
-            ["node", "-e", js],
-            cwd=str(self.workspace),
-            env=env,
-            capture_output=True,
-            text=True,
-            timeout=timeout + 10,
-        )
-        if proc.returncode != 0:
-            stderr = (proc.stderr or "").strip()
-            if "Cannot find module 'playwright'" in stderr:
+        with self._pw_lock:
+            proc = self._playwright_worker()
+            proc.stdin.write(_dumps(payload) + b"\n")
+            proc.stdin.flush()
+            lines: list[bytes] = []
+            reader = threading.Thread(
+                target=lambda: lines.append(proc.stdout.readline()), daemon=True
+            )
+            reader.start()
+            reader.join(timeout + 10)
+            line = lines[0].strip() if lines else b""
+            if not line:
+                proc.kill()
+                self._pw_proc = None
+                return ToolCallResult(False, "Playwright failed: worker timed out or exited")
+        try:
+            data = _loads(line)
+        except Exception:
+            return ToolCallResult(True, line.decode("utf-8", errors="replace")[-12000:])
+        if not data.get("ok"):
+            error = str(data.get("error", "")).strip()
+            if "Cannot find module 'playwright'" in error:
                 return ToolCallResult(
                     False,
                     "Playwright not installed. Install Node.js Playwright first.",
                 )
-            return ToolCallResult(False, f"Playwright failed: {stderr[-1200:]}")
-        stdout = (proc.stdout or "").strip()
-        if not stdout:
-            return ToolCallResult(False, "Playwright returned empty output")
-        try:
-            data = json.loads(stdout.splitlines()[-1])
-        except Exception:
-            return ToolCallResult(True, stdout[-12000:])
+            return ToolCallResult(False, f"Playwright failed: {error[-1200:]}")
         if data.get("mode") == "screenshot":
-            rel = screenshot_path.relative_to(self.workspace)
+            rel = self._rel(screenshot_path)
             return ToolCallResult(True, f"Saved screenshot: {rel}")
         return ToolCallResult(True, str(data.get("text", "")))
+
+    def _playwright_worker(self) -> subprocess.Popen[bytes]:
+        proc = self._pw_proc
+        if proc is None or proc.poll() is not None:
+            proc = subprocess.Popen(
+                ["node", "-e", _PLAYWRIGHT_DRIVER],
+                cwd=str(self.workspace),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            _PLAYWRIGHT_WORKERS.add(proc)
+            self._pw_proc = proc
+        return proc
+
+    def close(self) -> None:
+        with self._pw_lock:
+            proc, self._pw_proc = self._pw_proc, None
+        if proc is not None:
+            _stop_worker(proc)